@@ -1,14 +1,43 @@
-from fastapi import FastAPI, Query
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from typing import Optional
-import json
 from pathlib import Path
+import os
+from player_store import PlayerStore, normalize_team, position_key, project
+from response_cache import CachedStaticFiles, ResponseCache
+from metrics import MetricsMiddleware, profiler, registry, stage
 
 app = FastAPI(title="MLB fWAR Player Explorer")
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
+app.add_middleware(MetricsMiddleware)
 
 DATA_FILE = Path("data/players.json")
+BINARY_FILE = Path("data/players.bin")
+# With several uvicorn workers each process maps the same data/players.bin and polls it
+# on its own, so after the fetcher rewrites it workers switch within one check interval
+store = PlayerStore(DATA_FILE, BINARY_FILE,
+                    check_interval=float(os.environ.get("PLAYER_STORE_CHECK_INTERVAL", "1.0")))
+response_cache = ResponseCache()
+DEFAULT_LIMIT = 500
+
+@app.on_event("startup")
+async def load_store():
+    await run_in_threadpool(store.reload)
+
+async def current_snapshot(request: Request):
+    """The store's snapshot, reloaded on a worker thread so the event loop keeps serving.
+
+    A validator naming a tag this worker hasn't loaded means another worker has
+    already switched to a newer file, so the file is checked right away instead
+    of waiting out the interval.
+    """
+    snapshot = store.current
+    if_none_match = request.headers.get("if-none-match")
+    stale = snapshot is not None and if_none_match and snapshot.tag not in if_none_match
+    if (store.check_due() or stale) and store.needs_reload():
+        snapshot = await run_in_threadpool(store.reload)
+    return snapshot
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
@@ -35,52 +64,141 @@ async def get_teams():
 async def get_positions():
     return {"positions": ["C", "1B", "2B", "3B", "SS", "RF", "CF", "LF", "DH", "SP", "RP", "CP"]}
 
+def players_cache_key(team, position, min_fwar, limit, cursor, field_list):
+    return (
+        "players",
+        normalize_team(team) if team else None,
+        position_key(position) if position else None,
+        min_fwar or 0,
+        limit,
+        cursor,
+        tuple(field_list or ()),
+    )
+
+def players_payload(snapshot, team, position, min_fwar, limit, cursor, field_list):
+    ids = snapshot.query(team, position, min_fwar)
+    with stage("page"):
+        try:
+            page_ids, next_cursor = snapshot.page(ids, cursor, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        players = snapshot.players
+        return {
+            "players": [project(players[i], field_list) for i in page_ids],
+            "total": len(ids),
+            "next_cursor": next_cursor,
+        }
+
+def warm_responses(snapshot):
+    """Pre-serialize and pre-compress the unfiltered listing and by-team payloads"""
+    response_cache.warm(snapshot, players_cache_key(None, None, 0, DEFAULT_LIMIT, None, None),
+                        lambda: players_payload(snapshot, None, None, 0, DEFAULT_LIMIT, None, None))
+    response_cache.warm(snapshot, ("by-team", None), lambda: {"by_team": snapshot.top_by_team()})
+    # Build the name search index now rather than on the first keystroke
+    snapshot.name_index
+
+store.listeners.append(warm_responses)
+
 @app.get("/api/players")
 async def get_players(
+    request: Request,
     team: Optional[str] = Query(None),
     position: Optional[str] = Query(None),
     min_fwar: Optional[float] = Query(0),
-    limit: Optional[int] = Query(500)
+    limit: Optional[int] = Query(DEFAULT_LIMIT, ge=1),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None)
 ):
-    if not DATA_FILE.exists():
+    snapshot = await current_snapshot(request)
+    if snapshot is None:
+        if store.error:
+            return {"players": [], "total": 0, "message": store.error}
         return {"players": [], "total": 0, "message": "No data file found. Run: python data_fetcher.py"}
     
-    try:
-        with open(DATA_FILE, "r") as f:
-            players = json.load(f)
-    except Exception as e:
-        return {"players": [], "total": 0, "message": f"Error loading data: {str(e)}"}
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    key = players_cache_key(team, position, min_fwar, limit, cursor, field_list)
+    return response_cache.respond(
+        request, snapshot, key,
+        lambda: players_payload(snapshot, team, position, min_fwar, limit, cursor, field_list))
+
+@app.get("/api/players/search")
+async def search_players(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    fields: Optional[str] = Query(None)
+):
+    snapshot = await current_snapshot(request)
+    if snapshot is None:
+        return {"query": q, "players": []}
     
-    filtered = players
-    if team:
-        filtered = [p for p in filtered if team.lower() in [t.lower() for t in p.get("teams", [])]]
-    if position:
-        pos_upper = position.upper()
-        if pos_upper in ["SP", "RP", "CP"]:
-            filtered = [p for p in filtered if any(pos.upper() in ["P", "SP", "RP", "CP"] for pos in p.get("positions", []))]
-        else:
-            filtered = [p for p in filtered if pos_upper in [pos.upper() for pos in p.get("positions", [])]]
-    if min_fwar:
-        filtered = [p for p in filtered if p.get("fwar", 0) >= min_fwar]
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    # The raw query is echoed back, so it keys the cache rather than its normalized form
+    key = ("search", q, limit, tuple(field_list or ()))
     
-    filtered.sort(key=lambda x: x.get("fwar", 0), reverse=True)
-    return {"players": filtered[:limit], "total": len(filtered)}
+    def build():
+        players = snapshot.players
+        ids = snapshot.name_index.search(q, limit)
+        return {"query": q, "players": [project(players[i], field_list) for i in ids]}
+    
+    return response_cache.respond(request, snapshot, key, build)
 
 @app.get("/api/players/by-team")
-async def get_players_by_team():
-    if not DATA_FILE.exists():
+async def get_players_by_team(request: Request, top: Optional[int] = Query(None, ge=1, le=100)):
+    snapshot = await current_snapshot(request)
+    if snapshot is None:
         return {"by_team": {}}
     
-    with open(DATA_FILE, "r") as f:
-        players = json.load(f)
-    
-    by_team = {}
-    for player in players:
-        for team in player.get("teams", []):
-            if team not in by_team or player.get("fwar", 0) > by_team[team].get("fwar", 0):
-                by_team[team] = player
-    
-    return {"by_team": by_team}
+    return response_cache.respond(request, snapshot, ("by-team", top),
+                                  lambda: {"by_team": snapshot.top_by_team(top)})
+
+@app.get("/api/status")
+async def get_status():
+    return {**store.status(), "response_cache": response_cache.stats()}
+
+registry.describe("mlb_snapshot_version", "Snapshots loaded by this worker since it started")
+registry.describe("mlb_snapshot_players", "Players in the current snapshot")
+registry.describe("mlb_snapshot_loaded_timestamp_seconds", "Unix time the current snapshot was loaded")
+registry.describe("mlb_response_cache_entries", "Serialized responses held in the response cache")
+registry.describe("mlb_response_cache_hits_total", "Response cache lookups that found a body")
+registry.describe("mlb_response_cache_misses_total", "Response cache lookups that had to build a body")
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    # Metrics are per worker process; each series is labelled with the worker's pid
+    status = store.status()
+    cache = response_cache.stats()
+    gauges = {
+        "mlb_snapshot_version": status["version"],
+        "mlb_snapshot_players": status["players"],
+        "mlb_snapshot_loaded_timestamp_seconds": status["loaded_at"] or 0,
+        "mlb_response_cache_entries": cache["entries"],
+    }
+    counters = {
+        "mlb_response_cache_hits_total": cache["hits"],
+        "mlb_response_cache_misses_total": cache["misses"],
+    }
+    return PlainTextResponse(registry.render(gauges, counters), media_type="text/plain; version=0.0.4")
+
+# The sampling profiler is off unless the deployment opts in
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "") == "1"
+
+@app.post("/debug/profile")
+async def start_profile(requests: int = Query(100, ge=1, le=100000)):
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    try:
+        output = profiler.start(requests)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"profiling": True, "requests": requests, "output": str(output)}
+
+@app.get("/debug/profile")
+async def get_profile_status():
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return profiler.status()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,462 @@
+"""
+Benchmarks for the API and data pipeline.
+
+    python benchmark.py micro --sizes 1000,10000,100000 --output bench.json
+    python benchmark.py load --players 100000 --concurrency 32 --duration 10 --output load.json
+    python benchmark.py compare old.json new.json
+
+Datasets are synthetic but have the same shape as load_real_players_only.
+Requests go straight through the ASGI app in-process (no server, no network),
+so numbers reflect app.py and the store rather than the HTTP stack. Pass
+--url to the load command to drive a running server instead.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+os.chdir(Path(__file__).resolve().parent)
+
+import app as app_module
+import snapshot_format
+from player_store import PlayerStore, Snapshot
+from response_cache import ResponseCache, dumps
+
+TEAMS = [
+    "Arizona Diamondbacks", "Atlanta Braves", "Baltimore Orioles", "Boston Red Sox",
+    "Chicago Cubs", "Chicago White Sox", "Cincinnati Reds", "Cleveland Guardians",
+    "Colorado Rockies", "Detroit Tigers", "Houston Astros", "Kansas City Royals",
+    "Los Angeles Angels", "Los Angeles Dodgers", "Miami Marlins", "Milwaukee Brewers",
+    "Minnesota Twins", "New York Mets", "New York Yankees", "Oakland Athletics",
+    "Philadelphia Phillies", "Pittsburgh Pirates", "San Diego Padres", "San Francisco Giants",
+    "Seattle Mariners", "St. Louis Cardinals", "Tampa Bay Rays", "Texas Rangers",
+    "Toronto Blue Jays", "Washington Nationals", "Montreal Expos", "Brooklyn Dodgers",
+    "Washington Senators", "Philadelphia Athletics", "St. Louis Browns", "Boston Braves",
+]
+POSITIONS = ["C", "1B", "2B", "3B", "SS", "LF", "CF", "RF", "OF", "DH", "SP", "RP", "CP", "P"]
+COUNTRIES = ["Dominican Republic", "Venezuela", "Cuba", "Japan", "Puerto Rico", "Mexico",
+             "South Korea", "Colombia", "Panama", "Curaçao"]
+FIRST = ["Alex", "Juan", "José", "Mike", "Carlos", "Ángel", "David", "Luis", "Julio", "Pedro",
+         "Willie", "Derek", "Hideki", "Miguel", "Iván", "Shohei", "Ken", "Frank", "Roberto", "Tony"]
+LAST = ["Rodríguez", "Martínez", "Smith", "Johnson", "Ramírez", "Williams", "Pérez", "Brown",
+        "García", "Jones", "Suzuki", "Hernández", "Davis", "Ortiz", "Miller", "Castillo"]
+
+# Query combinations measured against /api/players
+PLAYER_QUERIES = [
+    {},
+    {"team": "New York Yankees"},
+    {"position": "SS"},
+    {"position": "SP"},
+    {"min_fwar": 20},
+    {"team": "Boston Red Sox", "position": "CF"},
+    {"team": "Los Angeles Dodgers", "min_fwar": 10},
+    {"team": "Chicago Cubs", "position": "SP", "min_fwar": 5},
+    {"limit": 50, "fields": "name,bwar,teams"},
+]
+
+
+def synthetic_players(n: int, seed: int = 0) -> List[Dict]:
+    """n players shaped like load_real_players_only output, with a long-tailed WAR distribution"""
+    rng = random.Random(seed)
+    players = []
+    for i in range(n):
+        start = rng.randint(1880, 2024)
+        player = {
+            "name": f"{rng.choice(FIRST)} {rng.choice(LAST)} {i}",
+            "bwar": round(rng.paretovariate(1.5) * 3 - 3 + rng.uniform(-2, 2), 1),
+            "teams": rng.sample(TEAMS, rng.choice([1, 1, 2, 2, 3, 4, 6])),
+            "positions": rng.sample(POSITIONS, rng.choice([1, 1, 2, 2, 3])),
+            "years_active": [str(start), str(min(2024, start + rng.randint(0, 22)))],
+            "minor_league": rng.random() < 0.2,
+            "international_signing": rng.random() < 0.25,
+        }
+        if player["international_signing"]:
+            player["signing_country"] = rng.choice(COUNTRIES)
+        players.append(player)
+    return players
+
+
+# --- In-process ASGI client ---------------------------------------------------
+
+async def asgi_get(app, path: str, params: Optional[Dict] = None,
+                   headers: Optional[Dict] = None) -> Tuple[int, Dict, bytes]:
+    """Minimal ASGI GET; returns (status, headers, body)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": urlencode(params or {}).encode(), "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 0), "server": ("benchmark", 80),
+    }
+    status = 0
+    response_headers = {}
+    body = bytearray()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers.update((k.decode(), v.decode()) for k, v in message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, response_headers, bytes(body)
+
+
+def use_dataset(json_path: Path, binary_path: Optional[Path]) -> PlayerStore:
+    """Point the app at a benchmark dataset with a fresh store and response cache"""
+    store = PlayerStore(json_path, binary_path)
+    store.listeners.append(app_module.warm_responses)
+    app_module.store = store
+    app_module.response_cache = ResponseCache()
+    store.reload(force=True)
+    return store
+
+
+def write_dataset(players: List[Dict], directory: Path) -> Tuple[Path, Path]:
+    json_path = directory / "players.json"
+    binary_path = directory / "players.bin"
+    with open(json_path, "w") as f:
+        json.dump(players, f, indent=2)
+    snapshot_format.write(binary_path, players)
+    return json_path, binary_path
+
+
+# --- Measurement helpers ------------------------------------------------------
+
+def timed(fn, repeat: int) -> Dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def timed_async(fn, repeat: int) -> Dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def percentile(sorted_samples: List[float], p: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    k = min(len(sorted_samples) - 1, max(0, round(p / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[k]
+
+
+def summarize(samples: List[float]) -> Dict:
+    """Seconds in, milliseconds out"""
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "min_ms": ordered[0] * 1000 if ordered else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def process_peak_rss_mb(pid: int) -> float:
+    """Peak resident set size of another process, from /proc (Linux only)"""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    raise ValueError(f"No VmHWM for process {pid}")
+
+
+def environment() -> Dict:
+    import response_cache
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "orjson": response_cache.orjson is not None,
+        "brotli": response_cache.brotli is not None,
+    }
+
+
+def query_name(params: Dict) -> str:
+    return "&".join(f"{k}={v}" for k, v in params.items()) or "unfiltered"
+
+
+# --- Micro benchmarks ---------------------------------------------------------
+
+async def bench_requests(repeat: int) -> Dict:
+    app = app_module.app
+    results = {}
+    for params in PLAYER_QUERIES:
+        name = query_name(params)
+
+        # Uncached: an empty, zero-size response LRU so every call filters and serializes
+        app_module.response_cache = ResponseCache(max_entries=0)
+        uncached = await timed_async(lambda: asgi_get(app, "/api/players", params), repeat)
+        app_module.response_cache = ResponseCache()
+        await asgi_get(app, "/api/players", params)
+        cached = await timed_async(lambda: asgi_get(app, "/api/players", params), repeat)
+        results[f"players[{name}]"] = {"uncached": uncached, "cached": cached}
+
+    app_module.response_cache = ResponseCache(max_entries=0)
+    by_team = await timed_async(lambda: asgi_get(app, "/api/players/by-team", {"top": 3}), repeat)
+    search = await timed_async(lambda: asgi_get(app, "/api/players/search", {"q": "rodr"}), repeat)
+    app_module.response_cache = ResponseCache()
+    results["by-team[top=3]"] = {"uncached": by_team}
+    results["search[q=rodr]"] = {"uncached": search}
+    return results
+
+
+def bench_size(n: int, repeat: int) -> Dict:
+    players = synthetic_players(n)
+    result = {"players": n}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        start = time.perf_counter()
+        json_path, binary_path = write_dataset(players, tmp)
+        result["write_s"] = time.perf_counter() - start
+        result["json_bytes"] = json_path.stat().st_size
+        result["binary_bytes"] = binary_path.stat().st_size
+
+        load_repeat = max(1, min(repeat, 5 if n < 100_000 else 1))
+        result["load_json"] = timed(lambda: Snapshot(json.load(open(json_path)), 1, 0, 0), load_repeat)
+        result["load_binary"] = timed(lambda: Snapshot(snapshot_format.load(binary_path), 1, 0, 0),
+                                      load_repeat)
+
+        snapshot = use_dataset(json_path, binary_path).get()
+        payload = {"players": [snapshot.players[i] for i in snapshot.order[:500]], "total": n}
+        body = dumps(payload)
+        result["serialize_500"] = timed(lambda: dumps(payload), repeat)
+        result["serialize_500_stdlib"] = timed(
+            lambda: json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(), repeat)
+        result["gzip_500"] = timed(lambda: gzip.compress(body, 6), max(1, repeat // 5))
+        result["requests"] = asyncio.run(bench_requests(repeat))
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def bench_size_subprocess(n: int, repeat: int) -> Dict:
+    """bench_size in a fresh interpreter, so its peak RSS isn't inflated by earlier sizes"""
+    result = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "micro", "--sizes", str(n), "--repeat", str(repeat)],
+        stdout=subprocess.PIPE, check=True)
+    return json.loads(result.stdout)["sizes"][str(n)]
+
+
+def run_micro(args) -> Dict:
+    sizes = [int(s) for s in args.sizes.split(",")]
+    report = {"kind": "micro", "environment": environment(), "sizes": {}}
+    for n in sizes:
+        print(f"Benchmarking {n} players...", file=sys.stderr)
+        if len(sizes) == 1:
+            report["sizes"][str(n)] = bench_size(n, args.repeat)
+        else:
+            report["sizes"][str(n)] = bench_size_subprocess(n, args.repeat)
+    return report
+
+
+# --- Load generator -----------------------------------------------------------
+
+def load_request_mix(rng: random.Random) -> Tuple[str, Dict]:
+    roll = rng.random()
+    if roll < 0.6:
+        return "/api/players", rng.choice(PLAYER_QUERIES)
+    if roll < 0.8:
+        return "/api/players/by-team", {}
+    return "/api/players/search", {"q": rng.choice(FIRST + LAST)[:rng.randint(2, 5)]}
+
+
+async def load_in_process(concurrency: int, duration: float, seed: int) -> Tuple[List[float], int]:
+    app = app_module.app
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int):
+        nonlocal errors
+        rng = random.Random(seed + worker_id)
+        while time.perf_counter() < deadline:
+            path, params = load_request_mix(rng)
+            start = time.perf_counter()
+            status, _, _ = await asgi_get(app, path, params, {"Accept-Encoding": "gzip"})
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors
+
+
+def load_http(url: str, concurrency: int, duration: float, seed: int) -> Tuple[List[float], int]:
+    import requests
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_id: int):
+        rng = random.Random(seed + worker_id)
+        session = requests.Session()
+        local = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            path, params = load_request_mix(rng)
+            start = time.perf_counter()
+            try:
+                ok = session.get(url.rstrip("/") + path, params=params, timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            local.append(time.perf_counter() - start)
+            local_errors += not ok
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0]
+
+
+def run_load(args) -> Dict:
+    report = {"kind": "load", "environment": environment(), "concurrency": args.concurrency,
+              "duration_s": args.duration}
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            report["target"] = args.url
+            start = time.perf_counter()
+            latencies, errors = load_http(args.url, args.concurrency, args.duration, args.seed)
+        else:
+            report["target"] = "in-process"
+            report["players"] = args.players
+            use_dataset(*write_dataset(synthetic_players(args.players), Path(tmp)))
+            start = time.perf_counter()
+            latencies, errors = asyncio.run(
+                load_in_process(args.concurrency, args.duration, args.seed))
+        elapsed = time.perf_counter() - start
+    report.update({
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": summarize(latencies),
+    })
+    if not args.url:
+        report["peak_rss_mb"] = peak_rss_mb()
+    elif args.server_pid:
+        # One entry per server process (e.g. each uvicorn worker); this process's RSS says nothing about them
+        report["server_peak_rss_mb"] = {str(pid): process_peak_rss_mb(pid) for pid in args.server_pid}
+    return report
+
+
+# --- Baseline comparison ------------------------------------------------------
+
+def flatten(report: Dict, prefix: str = "") -> Dict[str, float]:
+    """Timing and memory metrics keyed by dotted path; lower is better for all of them"""
+    metrics = {}
+    for key, value in report.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            if key == "environment":
+                continue
+            metrics.update(flatten(value, path))
+        elif key in ("p50_ms", "p99_ms", "mean_ms", "peak_rss_mb", "write_s"):
+            metrics[path] = value
+        elif key == "throughput_rps" and value:
+            # Invert so that, like the others, a larger number is worse
+            metrics[path + "^-1"] = 1.0 / value
+    return metrics
+
+
+def run_compare(args) -> int:
+    with open(args.baseline) as f:
+        old = flatten(json.load(f))
+    with open(args.current) as f:
+        new = flatten(json.load(f))
+    regressions = 0
+    for key in sorted(old.keys() & new.keys()):
+        if old[key] <= 0:
+            continue
+        ratio = new[key] / old[key]
+        flag = ""
+        if ratio > 1 + args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            flag = "  improved"
+        if flag or args.verbose:
+            print(f"{key}: {old[key]:.3f} -> {new[key]:.3f} ({ratio:.2f}x){flag}")
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    micro = sub.add_parser("micro", help="Snapshot load, per-query latency and serialization cost")
+    micro.add_argument("--sizes", default="1000,10000,100000",
+                       help="Comma-separated player counts (up to 1000000)")
+    micro.add_argument("--repeat", type=int, default=50)
+    micro.add_argument("--output", help="Write the JSON report here instead of stdout")
+
+    load = sub.add_parser("load", help="Concurrent load: throughput, p50/p99 latency, peak RSS")
+    load.add_argument("--players", type=int, default=100_000)
+    load.add_argument("--concurrency", type=int, default=32)
+    load.add_argument("--duration", type=float, default=10.0)
+    load.add_argument("--seed", type=int, default=0)
+    load.add_argument("--url", help="Drive a running server instead of the in-process app")
+    load.add_argument("--server-pid", type=int, action="append",
+                      help="With --url, report this server process's peak RSS (Linux; repeat for each worker)")
+    load.add_argument("--output", help="Write the JSON report here instead of stdout")
+
+    compare = sub.add_parser("compare", help="Compare two reports and exit non-zero on regressions")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown ratio (0.2 = 20%%)")
+    compare.add_argument("--verbose", action="store_true")
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        return run_compare(args)
+
+    report = run_micro(args) if args.command == "micro" else run_load(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,27 @@ Data fetcher for MLB player statistics.
 Uses ONLY real players with verified bWAR from Baseball Reference.
 NO RANDOM GENERATION - only actual historical players.
 """
+import csv
+import hashlib
+import io
 import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import snapshot_format
 
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
+INGEST_CACHE_FILE = DATA_DIR / "ingest_cache.json"
+MAX_WORKERS = 8
 
 def remove_fwar_from_players(players: List[Dict]) -> List[Dict]:
     """Remove fWAR field from all players"""
@@ -197,26 +212,330 @@ def load_real_players_only() -> List[Dict]:
     ]
     return players
 
+def write_json_atomic(path: Path, data):
+    """Write JSON to a temp file and rename it so readers never see a partial file"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
 def save_data(players: List[Dict], filename: str = "players.json"):
     """Save processed player data to JSON file"""
     filepath = DATA_DIR / filename
-    with open(filepath, "w") as f:
-        json.dump(players, f, indent=2)
+    write_json_atomic(filepath, players)
     
     # Also save to root for GitHub Pages
     root_file = Path("players.json")
-    with open(root_file, "w") as f:
-        json.dump(players, f, indent=2)
+    write_json_atomic(root_file, players)
+    
+    # Columnar copy the server memory-maps at startup; written last so it is never older than the JSON
+    binary_file = filepath.with_suffix(".bin")
+    snapshot_format.write(binary_file, players)
+    
+    print(f"Saved {len(players)} REAL players to {filepath}, {root_file} and {binary_file}")
+
+# --- Ingestion pipeline -------------------------------------------------------
+#
+# A source fetches raw bytes (skipping the download when its cache entry shows
+# it is unchanged) and hands them to a parser that turns them into player
+# records. CSV is read row by row; HTML is parsed as a whole document first.
+# Sources are fetched on a bounded thread pool sharing one pooled HTTP session;
+# records are merged into the existing player list on the main thread, in the
+# order the sources were given, so later sources win when they disagree. When
+# a source changes, every source after it is merged again, changed or not.
+#
+# The ingest cache is tied to the players.json it was merged into. If the data
+# is rebuilt or edited, every source is treated as changed on the next run.
+
+# Header aliases accepted in CSV files and HTML tables
+COLUMN_ALIASES = {
+    "name": "name", "player": "name",
+    "bwar": "bwar", "war": "bwar",
+    "fwar": "fwar",
+    "teams": "teams", "team": "teams", "tm": "teams",
+    "positions": "positions", "position": "positions", "pos": "positions",
+    "years_active": "years_active", "years": "years_active",
+    "from": "from", "to": "to",
+    "minor_league": "minor_league",
+    "international_signing": "international_signing",
+    "signing_country": "signing_country", "country": "signing_country",
+}
+
+def _split_list(value: str) -> List[str]:
+    for sep in (";", "|", ","):
+        if sep in value:
+            return [v.strip() for v in value.split(sep) if v.strip()]
+    return [value.strip()] if value.strip() else []
+
+def _parse_bool(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "y")
+
+def record_from_row(row: Dict[str, str]) -> Optional[Dict]:
+    """Normalize one CSV/HTML row (header -> cell text) into a player dict"""
+    fields = {}
+    for header, value in row.items():
+        key = COLUMN_ALIASES.get((header or "").strip().lower())
+        if key and value is not None and str(value).strip():
+            fields[key] = str(value).strip()
+    if "name" not in fields:
+        return None
+    
+    player = {"name": fields["name"]}
+    for key in ("bwar", "fwar"):
+        if key in fields:
+            try:
+                player[key] = float(fields[key])
+            except ValueError:
+                pass
+    for key in ("teams", "positions"):
+        if key in fields:
+            player[key] = _split_list(fields[key])
+    if "years_active" in fields:
+        player["years_active"] = [y.strip() for y in fields["years_active"].replace("\u2013", "-").split("-") if y.strip()]
+    elif "from" in fields:
+        player["years_active"] = [fields["from"], fields.get("to", fields["from"])]
+    for key in ("minor_league", "international_signing"):
+        if key in fields:
+            player[key] = _parse_bool(fields[key])
+    if "signing_country" in fields:
+        player["signing_country"] = fields["signing_country"]
+    return player
+
+def parse_csv(content: bytes) -> Iterator[Dict]:
+    """Stream player records from CSV with a header row"""
+    reader = csv.DictReader(io.TextIOWrapper(io.BytesIO(content), encoding="utf-8-sig"))
+    for row in reader:
+        player = record_from_row(row)
+        if player:
+            yield player
+
+def parse_html(content: bytes) -> Iterator[Dict]:
+    """Player records from every <table> whose header names a player column"""
+    soup = BeautifulSoup(content, "html.parser", parse_only=SoupStrainer("table"))
+    for table in soup.find_all("table"):
+        headers = None
+        for tr in table.find_all("tr"):
+            cells = [c.get_text(" ", strip=True) for c in tr.find_all(["th", "td"])]
+            if headers is None:
+                if tr.find("th") is not None:
+                    headers = cells
+                continue
+            # Baseball-Reference repeats the header row every few rows inside <tbody>
+            if cells == headers or "thead" in (tr.get("class") or []):
+                continue
+            player = record_from_row(dict(zip(headers, cells)))
+            if player:
+                yield player
+
+def parser_for(location: str):
+    return parse_csv if location.lower().endswith(".csv") else parse_html
+
+def checksum(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+class FileSource:
+    """Local CSV/HTML file; skipped without reading when mtime and size are unchanged"""
+    
+    def __init__(self, path, parser=None):
+        self.path = Path(path)
+        self.key = str(self.path)
+        self.parser = parser or parser_for(self.key)
+    
+    def fetch(self, session, cached: Dict) -> Optional[Dict]:
+        st = self.path.stat()
+        if cached.get("mtime") == st.st_mtime and cached.get("size") == st.st_size:
+            return None
+        content = self.path.read_bytes()
+        return {"content": content, "mtime": st.st_mtime, "size": st.st_size}
+
+class HttpSource:
+    """Remote page; uses conditional GET so unchanged pages aren't re-downloaded"""
+    
+    def __init__(self, url: str, parser=None, timeout: float = 30):
+        self.url = url
+        self.key = url
+        self.parser = parser or parser_for(url.split("?", 1)[0])
+        self.timeout = timeout
+    
+    def fetch(self, session, cached: Dict) -> Optional[Dict]:
+        headers = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+        response = session.get(self.url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        return {
+            "content": response.content,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+
+def make_source(location: str):
+    if location.startswith(("http://", "https://")):
+        return HttpSource(location)
+    return FileSource(location)
+
+def make_session(pool_size: int = MAX_WORKERS) -> requests.Session:
+    """HTTP session whose connection pool matches the worker count, with retries on transient errors"""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "mlb-fwar-explorer/1.0"
+    return session
+
+def merge_player(existing: Dict, incoming: Dict) -> Dict:
+    """Incoming scalar fields win; team and position lists are unioned in order"""
+    merged = dict(existing)
+    for key, value in incoming.items():
+        if key in ("teams", "positions") and key in existing:
+            merged[key] = existing[key] + [v for v in value if v not in existing[key]]
+        else:
+            merged[key] = value
+    return merged
+
+def players_checksum() -> Optional[str]:
+    """Checksum of data/players.json, or None when it doesn't exist"""
+    try:
+        return checksum((DATA_DIR / "players.json").read_bytes())
+    except OSError:
+        return None
+
+def load_ingest_cache() -> Dict:
+    """Per-source cache entries, or {} when they were recorded against different player data"""
+    try:
+        with open(INGEST_CACHE_FILE, "r") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    snapshot = players_checksum()
+    if snapshot is None or cache.get("snapshot") != snapshot:
+        return {}
+    return cache.get("sources", {})
+
+def save_ingest_cache(sources: Dict):
+    """Record source entries against the players.json currently on disk"""
+    snapshot = players_checksum()
+    if snapshot is None:
+        return
+    write_json_atomic(INGEST_CACHE_FILE, {"snapshot": snapshot, "sources": sources})
+
+def load_existing_players() -> List[Dict]:
+    try:
+        with open(DATA_DIR / "players.json", "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return load_real_players_only()
+
+def _fetch(src, session, cached: Dict) -> Optional[Dict]:
+    result = src.fetch(session, cached)
+    if result is not None:
+        result["checksum"] = checksum(result["content"])
+    return result
+
+def _fetch_all(pool, session, sources, cached: List[Dict]) -> List:
+    """Fetch sources concurrently; each result is a dict, None (unchanged) or the fetch error"""
+    futures = [pool.submit(_fetch, src, session, entry) for src, entry in zip(sources, cached)]
+    results = []
+    for src, future in zip(sources, futures):
+        try:
+            results.append(future.result())
+        except (OSError, requests.RequestException) as e:
+            print(f"  Failed to fetch {src.key}: {e}")
+            results.append(e)
+    return results
+
+def ingest(sources, players: List[Dict], cache: Dict, max_workers: int = MAX_WORKERS, session=None):
+    """Fetch sources in parallel and merge changed ones into players, in argument order.
+
+    Returns (players, cache, stats). Sources whose content is unchanged since
+    the cache entry was written are neither parsed nor merged, unless an
+    earlier source changed: the later source must still win, so it is
+    fetched again if needed and merged after it.
+    """
+    sources = list(sources)
+    by_name = {p.get("name"): i for i, p in enumerate(players)}
+    players = list(players)
+    cache = dict(cache)
+    stats = {"changed": 0, "unchanged": 0, "failed": 0, "records": 0}
+    session = session or make_session(max_workers)
     
-    print(f"Saved {len(players)} REAL players to {filepath} and {root_file}")
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = _fetch_all(pool, session, sources, [cache.get(src.key, {}) for src in sources])
+        changed = {i for i, (src, result) in enumerate(zip(sources, results))
+                   if isinstance(result, dict) and cache.get(src.key, {}).get("checksum") != result["checksum"]}
+        first_changed = min(changed, default=len(sources))
+        # Unchanged sources after the first changed one weren't downloaded; fetch them unconditionally
+        refetch = [i for i in range(first_changed + 1, len(sources)) if results[i] is None]
+        for i, result in zip(refetch, _fetch_all(pool, session, [sources[i] for i in refetch],
+                                                 [{} for _ in refetch])):
+            results[i] = result
+    
+    for i, (src, result) in enumerate(zip(sources, results)):
+        if isinstance(result, Exception):
+            # Dropping the entry makes the next run fetch and merge this source in full
+            cache.pop(src.key, None)
+            stats["failed"] += 1
+            continue
+        status = "changed" if i in changed else "unchanged"
+        if result is None or (status == "unchanged" and i < first_changed):
+            if result is not None:
+                result.pop("content")
+                cache[src.key] = result
+            stats["unchanged"] += 1
+            continue
+        
+        content = result.pop("content")
+        try:
+            records = list(src.parser(content))
+        except (ValueError, csv.Error) as e:
+            # UnicodeDecodeError is a ValueError; a bad source must not sink the others
+            print(f"  Failed to parse {src.key}: {e}")
+            cache.pop(src.key, None)
+            stats["failed"] += 1
+            continue
+        for record in records:
+            j = by_name.get(record["name"])
+            if j is None:
+                by_name[record["name"]] = len(players)
+                players.append(record)
+            else:
+                players[j] = merge_player(players[j], record)
+        stats["records"] += len(records)
+        cache[src.key] = result
+        stats[status] += 1
+    
+    return players, cache, stats
 
-def main():
-    """Main function - ONLY real players, NO random generation"""
+def main(argv: Optional[List[str]] = None):
+    """Main function - ONLY real players, NO random generation.
+
+    With source arguments (CSV/HTML files or URLs), merges them into the
+    existing data instead of rebuilding it.
+    """
+    locations = sys.argv[1:] if argv is None else argv
+    if locations:
+        print(f"Ingesting {len(locations)} source(s)...")
+        players, cache, stats = ingest([make_source(l) for l in locations],
+                                       load_existing_players(), load_ingest_cache())
+        print(f"  {stats['changed']} changed, {stats['unchanged']} unchanged, "
+              f"{stats['failed']} failed, {stats['records']} records merged")
+        if stats["changed"]:
+            save_data(players)
+        save_ingest_cache(cache)
+        return
+    
     print("Loading ONLY real players with verified bWAR from Baseball Reference...")
     print("NO random/fake players will be generated.")
     
     players = load_real_players_only()
     save_data(players)
+    # Previously ingested records are gone, so every source must be merged again
+    INGEST_CACHE_FILE.unlink(missing_ok=True)
     
     print(f"Data loading complete! {len(players)} REAL players loaded.")
     print(f"Top 10 by bWAR:")
@@ -0,0 +1,262 @@
+"""
+Request metrics, per-stage timers and an opt-in sampling profiler.
+
+Histograms are exposed in Prometheus text format by the /metrics endpoint.
+Stage timers wrap the hot path (snapshot load, filtering, sorting, encoding);
+they cost two perf_counter calls and a lock each. The profiler thread only
+runs while a profile is being captured.
+"""
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Seconds; spans sub-millisecond cached responses up to cold multi-second loads
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Query parameters that make up a request's "shape"; anything else is folded into "other"
+SHAPE_PARAMS = {"team", "position", "min_fwar", "limit", "cursor", "fields", "top", "q"}
+
+PROFILE_DIR = Path("data/profiles")
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Histograms keyed by metric name and a sorted tuple of label pairs"""
+
+    def __init__(self):
+        self.histograms: Dict[str, Dict[Tuple, Histogram]] = {}
+        self.help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, text: str):
+        self.help[name] = text
+
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram()
+            hist.observe(value)
+
+    def _header(self, lines: List[str], name: str, kind: str):
+        if name in self.help:
+            lines.append(f"# HELP {name} {self.help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def render(self, gauges: Optional[Dict[str, float]] = None,
+               counters: Optional[Dict[str, float]] = None) -> str:
+        """Prometheus text exposition format.
+
+        Every series carries a pid label: each worker process keeps its own
+        registry, so series from different workers must not be merged.
+        """
+        process = f'pid="{os.getpid()}"'
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self.histograms.items()):
+                self._header(lines, name, "histogram")
+                for key, hist in sorted(series.items()):
+                    labels = ",".join([process] + [f'{k}="{_escape(v)}"' for k, v in key])
+                    cumulative = 0
+                    for bound, n in zip(BUCKETS + (float("inf"),), hist.counts):
+                        cumulative += n
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+                    lines.append(f"{name}_sum{{{labels}}} {hist.sum}")
+                    lines.append(f"{name}_count{{{labels}}} {hist.count}")
+        for kind, values in (("gauge", gauges), ("counter", counters)):
+            for name, value in sorted((values or {}).items()):
+                self._header(lines, name, kind)
+                lines.append(f"{name}{{{process}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+registry.describe("mlb_http_request_duration_seconds", "Request latency by route, query shape and status")
+registry.describe("mlb_stage_duration_seconds", "Time spent in each stage of the player query path")
+
+
+class stage:
+    """Context manager timing one stage of the hot path: `with stage("filter"): ...`"""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registry.observe("mlb_stage_duration_seconds", time.perf_counter() - self.start, stage=self.name)
+        return False
+
+
+def query_shape(query_string: bytes) -> str:
+    """Sorted names of the parameters present, e.g. "min_fwar,team"; values never become labels"""
+    names = set()
+    for part in query_string.decode("latin-1").split("&"):
+        name = part.split("=", 1)[0]
+        if name:
+            names.add(name if name in SHAPE_PARAMS else "other")
+    return ",".join(sorted(names)) or "none"
+
+
+class SamplingProfiler:
+    """Samples one thread's stack at a fixed interval while a capture is active.
+
+    Output is folded stacks ("frame;frame;frame count" per line), which
+    flamegraph.pl, speedscope and inferno read directly.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.remaining = 0
+        self.output: Optional[Path] = None
+        self.last_output: Optional[Path] = None
+        self._samples: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._target: Optional[int] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.remaining > 0
+
+    def start(self, requests: int, thread_id: Optional[int] = None) -> Path:
+        """Capture until `requests` more requests have finished; returns the output path"""
+        with self._lock:
+            if self.active:
+                raise RuntimeError("A profile is already being captured")
+            if self._thread is not None and self._thread.is_alive():
+                raise RuntimeError("The previous profile is still being written")
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            self.output = PROFILE_DIR / f"profile-{os.getpid()}-{int(time.time())}.folded"
+            self.remaining = requests
+            self._samples = Counter()
+            self._target = thread_id or threading.get_ident()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return self.output
+
+    def request_finished(self):
+        if not self.active:
+            return
+        with self._lock:
+            self.remaining -= 1
+            if self.remaining > 0:
+                return
+        # Called on the event loop: the sampler thread writes the file once it sees the flag
+        self._stop.set()
+
+    def stop(self):
+        """End the capture and wait for the profile to be written"""
+        self.remaining = 0
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                # Function start line, not the current line, so each function is one flamegraph frame
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self._samples[";".join(reversed(stack))] += 1
+        self._write()
+
+    def _write(self):
+        if self.output is None:
+            return
+        with open(self.output, "w") as f:
+            for stack, count in self._samples.most_common():
+                f.write(f"{stack} {count}\n")
+        self.last_output = self.output
+        self.output = None
+
+    def status(self) -> Dict:
+        return {
+            "active": self.active,
+            "remaining_requests": self.remaining,
+            "output": str(self.output or self.last_output) if (self.output or self.last_output) else None,
+        }
+
+
+profiler = SamplingProfiler()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template and query shape"""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Dict = {}
+
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is not None:
+            if not self._route_paths:
+                # Built lazily: routes are all registered by the time requests arrive
+                app = scope.get("app")
+                for route in getattr(app, "routes", []):
+                    # Mounts (like /static) report their sub-app as the endpoint
+                    target = getattr(route, "endpoint", None) or getattr(route, "app", None)
+                    if target is not None:
+                        self._route_paths[target] = route.path
+            return self._route_paths.get(endpoint, getattr(endpoint, "__name__", "unknown"))
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.observe(
+                "mlb_http_request_duration_seconds", time.perf_counter() - start,
+                route=self._route_label(scope), shape=query_shape(scope.get("query_string", b"")),
+                status=str(status),
+            )
+            profiler.request_finished()
@@ -0,0 +1,348 @@
+"""
+Process-wide in-memory store for player data.
+Loads data/players.json once and swaps in a new snapshot when the file changes.
+"""
+import base64
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+from pathlib import Path
+from typing import Callable, List, Dict, Optional, Sequence
+
+import snapshot_format
+from metrics import stage
+from search_index import NameIndex
+from snapshot_format import ColumnarPlayers
+
+PITCHER_POSITIONS = {"P", "SP", "RP", "CP"}
+PITCHER_KEY = "PITCHER"
+
+
+def player_war(player: Dict) -> float:
+    """WAR used for ranking; fWAR when present, otherwise bWAR"""
+    war = player.get("fwar")
+    if war is None:
+        war = player.get("bwar", 0)
+    return war or 0
+
+
+def normalize_team(team: str) -> str:
+    return team.strip().lower()
+
+
+def position_key(position: str) -> str:
+    """Index key for a position query; SP/RP/CP all select every pitcher"""
+    pos = position.strip().upper()
+    return PITCHER_KEY if pos in PITCHER_POSITIONS - {"P"} else pos
+
+
+def encode_cursor(war: float, pid: int) -> str:
+    """Opaque keyset cursor for the row after (war, pid) in WAR order"""
+    raw = json.dumps([war, pid], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        war, pid = json.loads(raw)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if (not isinstance(war, (int, float)) or isinstance(war, bool) or not math.isfinite(war)
+            or not isinstance(pid, int) or isinstance(pid, bool)):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return float(war), pid
+
+
+def project(player: Dict, fields: Optional[List[str]]) -> Dict:
+    if not fields:
+        return player
+    return {k: player[k] for k in fields if k in player}
+
+
+def _members(players: Sequence[Dict], field: str) -> Dict[str, List[int]]:
+    """Value -> ascending ids of players whose list field contains it"""
+    members: Dict[str, List[int]] = {}
+    for i, p in enumerate(players):
+        for value in p.get(field, []):
+            ids = members.setdefault(value, [])
+            if not ids or ids[-1] != i:
+                ids.append(i)
+    return members
+
+
+def _position_keys(position: str) -> List[str]:
+    pos = position.upper()
+    return [pos, PITCHER_KEY] if pos in PITCHER_POSITIONS else [pos]
+
+
+def _group_postings(postings: Dict[str, Sequence[int]],
+                    keys: Callable[[str], List[str]]) -> Dict[str, Sequence[int]]:
+    """Index key -> ascending ranks; a key fed by a single value reuses its list instead of copying"""
+    groups: Dict[str, List[Sequence[int]]] = {}
+    for value, ranks in postings.items():
+        for key in keys(value):
+            groups.setdefault(key, []).append(ranks)
+    return {key: lists[0] if len(lists) == 1 else array("I", sorted(set(chain.from_iterable(lists))))
+            for key, lists in groups.items()}
+
+
+class Snapshot:
+    """Immutable view of one version of the player data, with lookup indexes"""
+
+    def __init__(self, players: Sequence[Dict], version: int, mtime: float, size: int,
+                 source: Optional[Path] = None):
+        self.players = players
+        self.version = version
+        self.mtime = mtime
+        self.size = size
+        self.source = source
+        self.loaded_at = time.time()
+        self._name_index: Optional[NameIndex] = None
+        self._build_indexes()
+
+    @property
+    def tag(self) -> str:
+        """Identifies this snapshot's content, for ETags.
+
+        Derived from the source file rather than the process-local version,
+        so every worker serving the same file produces the same tag.
+        """
+        return f"{int(self.mtime * 1000):x}-{self.size:x}"
+
+    def _build_indexes(self):
+        players = self.players
+        columnar = isinstance(players, ColumnarPlayers)
+        if columnar and players.sort_index("order") is not None:
+            # Read-only views over the mapped file, shared with other worker processes
+            self.wars = players.sort_index("war")
+            self.order = players.sort_index("order")
+            self.rank = players.sort_index("rank")
+            self.neg_wars = players.sort_index("neg_wars")
+        else:
+            # Columnar files without sort indexes are read column-wise, without building rows
+            self.wars = players.wars() if columnar else [player_war(p) for p in players]
+            # Reverse sorting is stable, so ties keep file order like list.sort on the raw data
+            self.order = sorted(range(len(players)), key=self.wars.__getitem__, reverse=True)
+            self.neg_wars = [-self.wars[i] for i in self.order]
+            self._build_rank()
+
+        team_postings = players.postings("teams") if columnar else None
+        position_postings = players.postings("positions") if columnar else None
+        if team_postings is None:
+            team_postings = self._postings(players, "teams")
+        if position_postings is None:
+            position_postings = self._postings(players, "positions")
+
+        # Posting lists are ascending WAR ranks, so they are already in result order.
+        # Team name as stored -> ranks; the normalized keys only copy when names differ by case
+        self.team_rosters: Dict[str, Sequence[int]] = team_postings
+        self.by_team = _group_postings(team_postings, lambda team: [normalize_team(team)])
+        self.by_position = _group_postings(position_postings, _position_keys)
+        self._top_cache: Dict[Optional[int], Dict] = {}
+
+    def _postings(self, players: Sequence, field: str) -> Dict[str, Sequence[int]]:
+        if isinstance(players, ColumnarPlayers):
+            members = players.members(field)
+        else:
+            members = _members(players, field)
+        rank = self.rank
+        return {value: array("I", sorted(rank[i] for i in ids)) for value, ids in members.items()}
+
+    @property
+    def name_index(self) -> NameIndex:
+        """Search index over player names, built on first use"""
+        if self._name_index is None:
+            if isinstance(self.players, ColumnarPlayers):
+                names = self.players.names()
+            else:
+                names = [p.get("name") for p in self.players]
+            self._name_index = NameIndex(names, self.rank, self.order)
+        return self._name_index
+
+    def _sort_key(self, i: int):
+        return (-self.wars[i], i)
+
+    def _build_rank(self):
+        # Inverse permutation of order: rank[player id] = position in WAR order
+        self.rank = sorted(range(len(self.order)), key=self.order.__getitem__)
+
+    def page(self, ids: Sequence[int], cursor: Optional[str], limit: int):
+        """Slice query results after a keyset cursor; returns (ids, next_cursor)"""
+        start = 0
+        if cursor:
+            war, pid = decode_cursor(cursor)
+            start = bisect_right(ids, (-war, pid), key=self._sort_key)
+        page_ids = ids[start:start + limit]
+        next_cursor = None
+        if page_ids and start + limit < len(ids):
+            last = page_ids[-1]
+            next_cursor = encode_cursor(self.wars[last], last)
+        return page_ids, next_cursor
+
+    def top_by_team(self, n: Optional[int] = None) -> Dict:
+        """Best n players per team as lists, computed once per snapshot.
+
+        With no n, each team maps to its single best player (the original response shape).
+        """
+        result = self._top_cache.get(n)
+        if result is None:
+            players = self.players
+            order = self.order
+            if n is None:
+                result = {team: players[order[ranks[0]]] for team, ranks in self.team_rosters.items() if ranks}
+            else:
+                result = {team: [players[order[r]] for r in ranks[:n]]
+                          for team, ranks in self.team_rosters.items() if ranks}
+            self._top_cache[n] = result
+        return result
+
+    def war_cutoff(self, min_fwar: Optional[float]) -> int:
+        """Number of players, in WAR order, with WAR >= min_fwar"""
+        if min_fwar != min_fwar:
+            # NaN compares false against every WAR, so nothing passes the filter
+            return 0
+        if not min_fwar:
+            return len(self.order)
+        return bisect_right(self.neg_wars, -min_fwar)
+
+    def query(self, team: Optional[str] = None, position: Optional[str] = None,
+              min_fwar: Optional[float] = None) -> Sequence[int]:
+        """Player ids matching the filters, sorted by WAR descending"""
+        cutoff = self.war_cutoff(min_fwar)
+        postings = []
+        if team:
+            postings.append(self.by_team.get(normalize_team(team), ()))
+        if position:
+            postings.append(self.by_position.get(position_key(position), ()))
+        if not postings:
+            return self.order[:cutoff]
+
+        with stage("filter"):
+            # Ranks below the cutoff are a prefix of each posting list
+            postings = sorted((p[:bisect_left(p, cutoff)] for p in postings), key=len)
+            ranks = postings[0]
+            if len(postings) > 1:
+                with stage("sort"):
+                    ranks = sorted(set(ranks).intersection(*postings[1:]))
+            order = self.order
+            return [order[r] for r in ranks]
+
+
+class PlayerStore:
+    """Holds the current player snapshot and reloads it when the file is rewritten"""
+
+    def __init__(self, path: Path, binary_path: Optional[Path] = None, check_interval: float = 1.0):
+        self.path = Path(path)
+        self.binary_path = Path(binary_path) if binary_path else None
+        self.check_interval = check_interval
+        self.error: Optional[str] = None
+        self._snapshot: Optional[Snapshot] = None
+        self._version = 0
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        # Called with each new snapshot after it is swapped in
+        self.listeners: List[Callable[[Snapshot], None]] = []
+
+    def _stat(self):
+        """(source, mtime, size) of the file to load, preferring an up-to-date binary snapshot"""
+        stats = []
+        for path in (self.path, self.binary_path):
+            if path is None:
+                continue
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stats.append((path, st.st_mtime, st.st_size))
+        if not stats:
+            return None
+        # The binary is written after the JSON, so it wins unless the JSON is newer
+        return max(stats, key=lambda s: (s[1], s[0] == self.binary_path))
+
+    def _is_current(self, stat) -> bool:
+        snap = self._snapshot
+        if stat is None:
+            return snap is None
+        return snap is not None and (snap.source, snap.mtime, snap.size) == stat
+
+    def _load(self, path: Path):
+        if path == self.binary_path:
+            return snapshot_format.load(path)
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _notify(self, snapshot: Optional[Snapshot]):
+        if snapshot is None:
+            return
+        for listener in self.listeners:
+            listener(snapshot)
+
+    def reload(self, force: bool = False) -> Optional[Snapshot]:
+        """Load the file if it changed since the last snapshot"""
+        previous = self._snapshot
+        snapshot = self._reload(force)
+        if snapshot is not previous:
+            self._notify(snapshot)
+        return snapshot
+
+    def _reload(self, force: bool) -> Optional[Snapshot]:
+        with self._lock:
+            self._last_check = time.monotonic()
+            stat = self._stat()
+            if not force and self._is_current(stat):
+                return self._snapshot
+            if stat is None:
+                self._snapshot = None
+                self.error = None
+                return None
+            source, mtime, size = stat
+            try:
+                with stage("load"):
+                    players = self._load(source)
+            except (OSError, ValueError) as e:
+                # Keep serving the previous snapshot if the file is mid-write or broken
+                self.error = f"Error loading data: {str(e)}"
+                return self._snapshot
+            self._version += 1
+            with stage("index"):
+                self._snapshot = Snapshot(players, self._version, mtime, size, source)
+            self.error = None
+            return self._snapshot
+
+    def get(self) -> Optional[Snapshot]:
+        """Return the current snapshot, checking the file at most once per interval"""
+        if self.check_due():
+            return self.reload()
+        return self._snapshot
+
+    @property
+    def current(self) -> Optional[Snapshot]:
+        """The snapshot in use, without checking the file"""
+        return self._snapshot
+
+    def check_due(self) -> bool:
+        return time.monotonic() - self._last_check >= self.check_interval
+
+    def needs_reload(self) -> bool:
+        """Whether the file changed since the current snapshot; only stats it, loads nothing"""
+        self._last_check = time.monotonic()
+        return not self._is_current(self._stat())
+
+    def status(self) -> Dict:
+        snap = self._snapshot
+        return {
+            "path": str(self.path),
+            "source": str(snap.source) if snap else None,
+            "loaded": snap is not None,
+            "version": snap.version if snap else 0,
+            "loaded_at": snap.loaded_at if snap else None,
+            "players": len(snap.players) if snap else 0,
+            "error": self.error,
+        }
@@ -0,0 +1,182 @@
+"""
+Caching helpers for API responses.
+Serialized bodies are kept per snapshot version, and ETags are derived from the snapshot.
+"""
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.staticfiles import StaticFiles
+
+from metrics import stage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Data only changes when the fetcher runs, so let clients keep it but always revalidate
+API_CACHE_CONTROL = "public, no-cache"
+STATIC_CACHE_CONTROL = "public, max-age=300"
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def dumps(content) -> bytes:
+    """Serialize with orjson when installed, otherwise the same way FastAPI's JSONResponse does"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def supported_encodings() -> List[str]:
+    """Content codings we can produce, in order of preference"""
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def negotiate_encoding(request: Request) -> str:
+    """Pick br or gzip from Accept-Encoding, falling back to identity"""
+    header = request.headers.get("accept-encoding", "")
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    for coding in supported_encodings():
+        if accepted.get(coding, accepted.get("*", 0)) > 0:
+            return coding
+    return "identity"
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+def snapshot_etag(snapshot, coding: str) -> str:
+    """ETag for a snapshot payload sent with the given content coding"""
+    return f'"{snapshot.tag}"' if coding == "identity" else f'"{snapshot.tag}-{coding}"'
+
+
+def matching_etag(request: Request, etags: List[str]) -> Optional[str]:
+    """The first of etags named by If-None-Match, or None"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etags[0]
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return next((etag for etag in etags if etag in tags), None)
+
+
+class ResponseCache:
+    """LRU of serialized response bodies per content coding, dropped wholesale when the snapshot version changes"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version: int, key: Hashable) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, version: int, key: Hashable, entry: Tuple[bytes, str]):
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def body(self, version: int, key: Hashable, encoding: str, build: Callable[[], Dict]):
+        """(body, applied content coding) for a payload, serialized and compressed at most once per version"""
+        entry = self.get(version, (key, encoding))
+        if entry is not None:
+            return entry
+        if encoding == "identity":
+            content = build()
+            with stage("encode"):
+                entry = (dumps(content), "identity")
+        else:
+            identity, _ = self.body(version, key, "identity", build)
+            if len(identity) >= MIN_COMPRESS_SIZE:
+                with stage("compress"):
+                    entry = (compress(identity, encoding), encoding)
+            else:
+                entry = (identity, "identity")
+        self.put(version, (key, encoding), entry)
+        return entry
+
+    def warm(self, snapshot, key: Hashable, build: Callable[[], Dict]):
+        """Pre-serialize and pre-compress a payload for a new snapshot"""
+        for encoding in ["identity"] + supported_encodings():
+            self.body(snapshot.version, key, encoding, build)
+
+    def respond(self, request: Request, snapshot, key: Hashable, build: Callable[[], Dict]) -> Response:
+        """Serve a snapshot-derived payload with an ETag, from cache when possible.
+
+        build is only called on a cache miss; a matching If-None-Match skips it entirely.
+        The ETag names the coding actually applied, since small bodies are sent
+        uncompressed whatever was negotiated.
+        """
+        encoding = negotiate_encoding(request)
+        headers = {"Cache-Control": API_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        # Any representation of the current snapshot is still valid, so revalidate
+        # without knowing which coding this body would get
+        candidates = [snapshot_etag(snapshot, c) for c in dict.fromkeys([encoding, "identity"])]
+        etag = matching_etag(request, candidates)
+        if etag is not None:
+            headers["ETag"] = etag
+            return Response(status_code=304, headers=headers)
+        body, applied = self.body(snapshot.version, key, encoding, build)
+        headers["ETag"] = snapshot_etag(snapshot, applied)
+        if applied != "identity":
+            headers["Content-Encoding"] = applied
+        return Response(body, media_type="application/json", headers=headers)
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles (which already handles ETag/Last-Modified) plus a Cache-Control header"""
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = STATIC_CACHE_CONTROL
+        return response
@@ -0,0 +1,145 @@
+"""
+Name search over a player snapshot.
+
+Names are accent-folded and lowercased. A sorted array of every word-start
+suffix ("alex rodriguez", "rodriguez") answers prefix queries with a binary
+search; a trigram index supplies candidates for misspelled queries.
+
+Common prefixes ("j") match a large slice of the array, so it is split into
+fixed-size blocks that each keep their best WAR ranks. A lookup scans only the
+partial blocks at the ends of the range plus the per-block top lists.
+"""
+import heapq
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Sequence
+
+MAX_RESULTS = 50
+BLOCK_SIZE = 128
+# Trigrams shared by more than this fraction of names say little about a typo
+COMMON_GRAM_FRACTION = 0.02
+MAX_FUZZY_CANDIDATES = 20
+MIN_FUZZY_SCORE = 0.7
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip accents and collapse punctuation: "Rodríguez Jr." -> "rodriguez jr" """
+    folded = unicodedata.normalize("NFKD", name)
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", folded.lower()).strip()
+
+
+def trigrams(text: str) -> List[str]:
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class NameIndex:
+    """Prefix and typo-tolerant lookup from names to player ids.
+
+    Built per process from the snapshot's names. Besides the normalized names
+    it only holds flat int arrays, and results are ordered through the
+    snapshot's WAR rank and order, which may be shared views over the
+    mapped file.
+    """
+
+    def __init__(self, names: Sequence[Optional[str]], rank: Sequence[int], order: Sequence[int]):
+        self.rank = rank
+        self.order = order
+        self.normalized = [normalize_name(n or "") for n in names]
+
+        # Every word start of every name, sorted by the suffix from that point on;
+        # the suffix strings themselves are only materialized while sorting
+        entries = []
+        for i, name in enumerate(self.normalized):
+            if not name:
+                continue
+            entries.append((name, i, 0))
+            for m in re.finditer(" ", name):
+                entries.append((name[m.end():], i, m.end()))
+        entries.sort()
+        self.key_ids = array("I", (i for _, i, _ in entries))
+        self.key_starts = array("I", (start for _, _, start in entries))
+        del entries
+        # Rank per entry: lower is better WAR
+        self.key_ranks = array("I", (rank[i] for i in self.key_ids))
+        self.block_top = [array("I", heapq.nsmallest(MAX_RESULTS, self.key_ranks[b:b + BLOCK_SIZE]))
+                          for b in range(0, len(self.key_ranks), BLOCK_SIZE)]
+
+        grams: Dict[str, List[int]] = {}
+        for i, name in enumerate(self.normalized):
+            for gram in set(trigrams(name)):
+                grams.setdefault(gram, []).append(i)
+        self.grams: Dict[str, array] = {gram: array("I", ids) for gram, ids in grams.items()}
+        self.common_gram_size = max(1, int(len(self.normalized) * COMMON_GRAM_FRACTION))
+
+    def _key(self, j: int) -> str:
+        return self.normalized[self.key_ids[j]][self.key_starts[j]:]
+
+    def prefix(self, query: str, limit: int = 10) -> List[int]:
+        """Ids with a name or name word starting with query, best WAR first"""
+        entries = range(len(self.key_ids))
+        start = bisect_left(entries, query, key=self._key)
+        end = bisect_left(entries, query + "\uffff", start, key=self._key)
+        ranks = self.key_ranks
+        first_full = -(-start // BLOCK_SIZE)
+        last_full = end // BLOCK_SIZE
+        if first_full >= last_full:
+            candidates = ranks[start:end]
+        else:
+            candidates = ranks[start:first_full * BLOCK_SIZE] + ranks[last_full * BLOCK_SIZE:end]
+            for b in range(first_full, last_full):
+                candidates.extend(self.block_top[b])
+        # A player can match through several words, so take extra and dedupe
+        ids = []
+        for r in heapq.nsmallest(limit * 4, candidates):
+            i = self.order[r]
+            if i not in ids:
+                ids.append(i)
+                if len(ids) == limit:
+                    break
+        return ids
+
+    def fuzzy(self, query: str, exclude=()) -> List[int]:
+        """Ids whose names are close to query, for misspellings; best match first"""
+        postings = sorted((self.grams.get(g, ()) for g in set(trigrams(query))), key=len)
+        rare = [p for p in postings if len(p) <= self.common_gram_size]
+        counts = Counter()
+        for posting in rare or postings[:1]:
+            counts.update(posting)
+        for i in exclude:
+            counts.pop(i, None)
+
+        scored = []
+        for i, _ in counts.most_common(MAX_FUZZY_CANDIDATES):
+            score = self._similarity(query, self.normalized[i])
+            if score >= MIN_FUZZY_SCORE:
+                scored.append((-score, self.rank[i], i))
+        scored.sort()
+        return [i for _, _, i in scored]
+
+    @staticmethod
+    def _similarity(query: str, name: str) -> float:
+        """Best match of query against the same-length start of the name or any of its words"""
+        best = 0.0
+        starts = [0] + [m.end() for m in re.finditer(" ", name)]
+        for s in starts:
+            best = max(best, SequenceMatcher(None, query, name[s:s + len(query)]).ratio())
+        return best
+
+    def search(self, query: str, limit: int = 10) -> List[int]:
+        """Prefix matches, topped up with fuzzy matches when there are fewer than limit"""
+        query = normalize_name(query)
+        limit = min(limit, MAX_RESULTS)
+        if not query:
+            return []
+        ids = self.prefix(query, limit)
+        if len(ids) < limit and len(query) >= 3:
+            ids += self.fuzzy(query, exclude=ids)[:limit - len(ids)]
+        return ids
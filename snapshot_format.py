@@ -0,0 +1,338 @@
+"""
+Columnar binary snapshot of the player list.
+
+Layout: MAGIC, u32 header length, JSON header, then 8-byte aligned column
+buffers. The header holds the string table and each column's typecode,
+offset and item count. Strings (names, teams, positions, countries) are
+stored as u32 codes into the string table; list fields use an offsets
+column plus a values column. Loading memory-maps the file and casts column
+buffers in place, so only the header is parsed.
+
+The file also carries the WAR sort order and its inverse ("index.*"
+columns), and for teams and positions a posting list per value: the WAR
+ranks of its players, ascending ("postings.*" columns). Worker processes
+that map the same file share those pages through the OS page cache rather
+than each building a private copy.
+"""
+import json
+import mmap
+import operator
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections import OrderedDict, defaultdict
+from itertools import chain, repeat
+from pathlib import Path
+from typing import List, Dict, Optional, Sequence
+
+MAGIC = b"MLBCOL1\0"
+MISSING = 0xFFFFFFFF
+# Materialized row dicts kept per process; everything else is read from the mapped columns
+ROW_CACHE_SIZE = 4096
+
+# Fields with a dedicated column; anything else goes in the per-player extras JSON
+FLOAT_FIELDS = ["bwar", "fwar"]
+BOOL_FIELDS = ["minor_league", "international_signing"]
+STRING_FIELDS = ["name", "signing_country"]
+STRING_LIST_FIELDS = ["teams", "positions"]
+YEAR_FIELD = "years_active"
+COLUMN_FIELDS = set(FLOAT_FIELDS + BOOL_FIELDS + STRING_FIELDS + STRING_LIST_FIELDS + [YEAR_FIELD])
+
+
+class _StringTable:
+    def __init__(self):
+        self.strings: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return MISSING
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+
+def _list_column(values: List[List[int]], typecode: str):
+    offsets = array("I", [0])
+    flat = array(typecode)
+    for items in values:
+        flat.extend(items)
+        offsets.append(len(flat))
+    return offsets, flat
+
+
+def _data_start(header_len: int) -> int:
+    """Column buffers start at the first 8-byte boundary after the header"""
+    end = len(MAGIC) + 4 + header_len
+    return end + (-end % 8)
+
+
+def _wars(fwar_column, bwar_column) -> List[float]:
+    result = []
+    for fwar, bwar in zip(fwar_column, bwar_column):
+        war = fwar if fwar == fwar else bwar
+        result.append(war if war == war else 0)
+    return result
+
+
+def _rows_by_code(offsets, codes, count: int) -> Dict[int, List[int]]:
+    """Code -> ascending row ids for a list column, each row at most once per code"""
+    # Row id of every entry, expanded from the offsets without a per-row Python loop
+    counts = map(operator.sub, offsets[1:], offsets[:-1])
+    rows = chain.from_iterable(map(repeat, range(count), counts))
+    by_code: Dict[int, List[int]] = defaultdict(list)
+    for code, row in zip(codes.tolist(), rows):
+        by_code[code].append(row)
+    # dict.fromkeys drops a player listing the same value twice, keeping order
+    return {code: list(dict.fromkeys(ids)) for code, ids in by_code.items()}
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_string_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
+def _encode_years(years) -> Optional[List[int]]:
+    try:
+        return [int(y) for y in years]
+    except (TypeError, ValueError):
+        return None
+
+
+def encode(players: List[Dict]) -> bytes:
+    """Serialize players into the columnar format"""
+    table = _StringTable()
+    columns: Dict[str, array] = {}
+
+    for field in FLOAT_FIELDS:
+        columns[field] = array("d", (float(v) if _is_number(v := p.get(field)) else float("nan")
+                                     for p in players))
+    for field in BOOL_FIELDS:
+        columns[field] = array("B", (1 if p.get(field) is True else 0 for p in players))
+    for field in STRING_FIELDS:
+        columns[field] = array("I", (table.code(v if isinstance(v := p.get(field), str) else None)
+                                     for p in players))
+    for field in STRING_LIST_FIELDS:
+        values = (p.get(field, []) for p in players)
+        offsets, codes = _list_column([[table.code(v) for v in items] if _is_string_list(items) else []
+                                       for items in values], "I")
+        columns[field + ".offsets"] = offsets
+        columns[field] = codes
+
+    # Years are kept as ints when they all parse; otherwise the player's list goes to extras
+    extras = []
+    years = []
+    for p in players:
+        extra = {k: v for k, v in p.items() if k not in COLUMN_FIELDS}
+        # Values a column can't reproduce exactly are kept verbatim in extras, which win on decode
+        for field in FLOAT_FIELDS:
+            if field in p and not (type(p[field]) is float and p[field] == p[field]):
+                extra[field] = p[field]
+        for field in BOOL_FIELDS:
+            if field in p and type(p[field]) is not bool:
+                extra[field] = p[field]
+        for field in STRING_FIELDS:
+            if field in p and not isinstance(p[field], str):
+                extra[field] = p[field]
+        for field in STRING_LIST_FIELDS:
+            if field in p and not _is_string_list(p[field]):
+                extra[field] = p[field]
+        for field in BOOL_FIELDS + STRING_LIST_FIELDS:
+            if field not in p:
+                extra.setdefault("_absent", []).append(field)
+        encoded = _encode_years(p[YEAR_FIELD]) if YEAR_FIELD in p else []
+        if encoded is None or (YEAR_FIELD in p and [str(y) for y in encoded] != p[YEAR_FIELD]):
+            extra[YEAR_FIELD] = p[YEAR_FIELD]
+            encoded = []
+        elif YEAR_FIELD not in p:
+            extra.setdefault("_absent", []).append(YEAR_FIELD)
+        years.append(encoded)
+        extras.append(table.code(json.dumps(extra)) if extra else MISSING)
+    offsets, flat = _list_column(years, "i")
+    columns[YEAR_FIELD + ".offsets"] = offsets
+    columns[YEAR_FIELD] = flat
+    columns["extras"] = array("I", extras)
+
+    # Sort indexes, so every process mapping the file shares them instead of rebuilding
+    wars = array("d", _wars(columns["fwar"], columns["bwar"]))
+    order = array("I", sorted(range(len(players)), key=wars.__getitem__, reverse=True))
+    rank = array("I", sorted(range(len(players)), key=order.__getitem__))
+    columns["index.war"] = wars
+    columns["index.order"] = order
+    columns["index.rank"] = rank
+    columns["index.neg_wars"] = array("d", (-wars[i] for i in order))
+    for field in STRING_LIST_FIELDS:
+        by_code = _rows_by_code(columns[field + ".offsets"], columns[field], len(players))
+        keys = array("I", sorted(by_code))
+        offsets, ranks = _list_column([sorted(rank[i] for i in by_code[code]) for code in keys], "I")
+        columns[f"postings.{field}.keys"] = keys
+        columns[f"postings.{field}.offsets"] = offsets
+        columns[f"postings.{field}"] = ranks
+
+    header = {"count": len(players), "byteorder": sys.byteorder,
+              "strings": table.strings, "columns": {}}
+    layout = []
+    pos = 0
+    for name, col in columns.items():
+        pos += -pos % 8
+        layout.append((pos, col))
+        header["columns"][name] = [col.typecode, pos, len(col)]
+        pos += len(col) * col.itemsize
+
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    data_start = _data_start(len(header_bytes))
+    out = bytearray(MAGIC)
+    out += struct.pack("<I", len(header_bytes))
+    out += header_bytes
+    for offset, col in layout:
+        out += b"\0" * (data_start + offset - len(out))
+        out += col.tobytes()
+    return bytes(out)
+
+
+def write(path: Path, players: List[Dict]):
+    """Write the snapshot via a temp file and rename, like the JSON output"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(encode(players))
+    os.replace(tmp_path, path)
+
+
+class ColumnarPlayers(Sequence):
+    """Read-only sequence of player dicts backed by column buffers.
+
+    Rows are materialized into dicts on first access; the columns
+    themselves are memoryviews over the mapped file.
+    """
+
+    def __init__(self, buffer, header: Dict, data_start: int):
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self.count = header["count"]
+        self.strings: List[str] = header["strings"]
+        self.columns = {}
+        start = data_start
+        for name, (typecode, offset, length) in header["columns"].items():
+            size = array(typecode).itemsize
+            begin = start + offset
+            self.columns[name] = self._view[begin:begin + length * size].cast(typecode)
+        self._rows: "OrderedDict[int, Dict]" = OrderedDict()
+        self._rows_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.count))]
+        if i < 0:
+            i += self.count
+        with self._rows_lock:
+            row = self._rows.get(i)
+            if row is not None:
+                self._rows.move_to_end(i)
+                return row
+        if not 0 <= i < self.count:
+            raise IndexError("player index out of range")
+        row = self._build_row(i)
+        with self._rows_lock:
+            self._rows[i] = row
+            if len(self._rows) > ROW_CACHE_SIZE:
+                self._rows.popitem(last=False)
+        return row
+
+    def _string(self, code: int) -> Optional[str]:
+        return None if code == MISSING else self.strings[code]
+
+    def string_list(self, field: str, i: int) -> List[str]:
+        offsets = self.columns[field + ".offsets"]
+        strings = self.strings
+        return [strings[c] for c in self.columns[field][offsets[i]:offsets[i + 1]]]
+
+    def _build_row(self, i: int) -> Dict:
+        cols = self.columns
+        extra_code = cols["extras"][i]
+        extra = json.loads(self.strings[extra_code]) if extra_code != MISSING else {}
+        absent = set(extra.pop("_absent", []))
+
+        row = {}
+        name = self._string(cols["name"][i])
+        if name is not None:
+            row["name"] = name
+        for field in FLOAT_FIELDS:
+            value = cols[field][i]
+            if value == value:
+                row[field] = value
+        for field in STRING_LIST_FIELDS:
+            if field not in absent:
+                row[field] = self.string_list(field, i)
+        if YEAR_FIELD not in absent and YEAR_FIELD not in extra:
+            offsets = cols[YEAR_FIELD + ".offsets"]
+            row[YEAR_FIELD] = [str(y) for y in cols[YEAR_FIELD][offsets[i]:offsets[i + 1]]]
+        for field in BOOL_FIELDS:
+            if field not in absent:
+                row[field] = bool(cols[field][i])
+        country = self._string(cols["signing_country"][i])
+        if country is not None:
+            row["signing_country"] = country
+        row.update(extra)
+        return row
+
+    def members(self, field: str) -> Dict[str, List[int]]:
+        """String -> ascending row ids for a list field, grouped by code"""
+        offsets = self.columns[field + ".offsets"]
+        by_code = _rows_by_code(offsets, self.columns[field], self.count)
+        return {self.strings[code]: ids for code, ids in by_code.items()}
+
+    def postings(self, field: str) -> Optional[Dict[str, Sequence[int]]]:
+        """String -> ascending WAR ranks for a list field, as views over the file; None for older files"""
+        keys = self.columns.get(f"postings.{field}.keys")
+        if keys is None:
+            return None
+        offsets = self.columns[f"postings.{field}.offsets"]
+        ranks = self.columns[f"postings.{field}"]
+        return {self.strings[code]: ranks[offsets[j]:offsets[j + 1]] for j, code in enumerate(keys)}
+
+    def names(self) -> List[Optional[str]]:
+        return [self._string(c) for c in self.columns["name"]]
+
+    def wars(self) -> List[float]:
+        """WAR per row without building dicts; fWAR when present, otherwise bWAR"""
+        return _wars(self.columns["fwar"], self.columns["bwar"])
+
+    def sort_index(self, name: str):
+        """Precomputed index column (war, order, rank, neg_wars), or None for older files"""
+        return self.columns.get("index." + name)
+
+
+def _parse_header(buffer):
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a columnar player snapshot")
+    (header_len,) = struct.unpack_from("<I", buffer, len(MAGIC))
+    start = len(MAGIC) + 4
+    header = json.loads(bytes(buffer[start:start + header_len]))
+    if header.get("byteorder") != sys.byteorder:
+        raise ValueError("Snapshot was written on a machine with a different byte order")
+    return header, _data_start(header_len)
+
+
+def load(path: Path) -> ColumnarPlayers:
+    """Memory-map a snapshot file; raises ValueError if it is not a valid snapshot"""
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return ColumnarPlayers(buffer, *_parse_header(buffer))
+    except Exception:
+        buffer.close()
+        raise
+
+
+def decode(data: bytes) -> ColumnarPlayers:
+    return ColumnarPlayers(data, *_parse_header(data))
@@ -13,7 +13,14 @@ const ALL_TEAMS = [
 
 const ALL_POSITIONS = ["C", "1B", "2B", "3B", "SS", "RF", "CF", "LF", "DH", "SP", "RP", "CP"];
 
+const PAGE_SIZE = 100;
+const TABLE_FIELDS = 'name,bwar,teams,positions,years_active,minor_league,international_signing,signing_country';
+
 let allPlayers = [], filteredPlayers = [];
+let totalPlayers = 0, filteredTotal = 0, nextCursor = null;
+// Filters of the query on screen; later pages reuse them so a cursor is never mixed with new filters
+let activeFilters = null;
+let staticPlayers = null;
 
 function loadTeams() {
     const select = document.getElementById('team-filter');
@@ -35,46 +42,93 @@ function loadPositions() {
     });
 }
 
-async function loadPlayers() {
-    const loading = document.getElementById('loading');
-    loading.style.display = 'block';
+function currentFilters() {
+    return {
+        team: document.getElementById('team-filter').value,
+        position: document.getElementById('position-filter').value,
+        minFwar: parseFloat(document.getElementById('min-fwar').value) || 0
+    };
+}
+
+async function fetchPage(filters, cursor) {
+    const { team, position, minFwar } = filters;
+    const params = new URLSearchParams({ limit: PAGE_SIZE, fields: TABLE_FIELDS });
+    if (team) params.set('team', team);
+    if (position) params.set('position', position);
+    if (minFwar > 0) params.set('min_fwar', minFwar);
+    if (cursor) params.set('cursor', cursor);
     
-    try {
+    const res = await fetch(`/api/players?${params}`);
+    if (!res.ok) throw new Error('API unavailable');
+    return res.json();
+}
+
+async function loadTotalPlayers() {
+    const res = await fetch('/api/status');
+    if (!res.ok) throw new Error('API unavailable');
+    return (await res.json()).players;
+}
+
+// Static hosting (GitHub Pages) has no API, so filter the full players.json in the browser.
+// It is downloaded once per page load; re-filtering reuses the parsed copy.
+async function loadAllFromStatic() {
+    if (!staticPlayers) {
         const res = await fetch('players.json');
         if (!res.ok) throw new Error('Failed to load data');
-        const players = await res.json();
-        
-        const team = document.getElementById('team-filter').value;
-        const position = document.getElementById('position-filter').value;
-        const minFwar = parseFloat(document.getElementById('min-fwar').value) || 0;
-        
-        let filtered = players;
-        if (team) {
+        staticPlayers = await res.json();
+    }
+    const players = staticPlayers;
+    
+    const { team, position, minFwar } = currentFilters();
+    let filtered = players;
+    if (team) {
+        filtered = filtered.filter(p => 
+            p.teams?.some(t => t.toLowerCase().includes(team.toLowerCase()))
+        );
+    }
+    if (position) {
+        const posUpper = position.toUpperCase();
+        if (["SP", "RP", "CP"].includes(posUpper)) {
             filtered = filtered.filter(p => 
-                p.teams?.some(t => t.toLowerCase().includes(team.toLowerCase()))
+                p.positions?.some(pos => ["P", "SP", "RP", "CP"].includes(pos.toUpperCase()))
+            );
+        } else {
+            filtered = filtered.filter(p => 
+                p.positions?.some(pos => pos.toUpperCase() === posUpper)
             );
         }
-        if (position) {
-            const posUpper = position.toUpperCase();
-            if (posUpper in ["SP", "RP", "CP"]) {
-                filtered = filtered.filter(p => 
-                    p.positions?.some(pos => ["P", "SP", "RP", "CP"].includes(pos.toUpperCase()))
-                );
-            } else {
-                filtered = filtered.filter(p => 
-                    p.positions?.some(pos => pos.toUpperCase() === posUpper)
-                );
-            }
-        }
-        if (minFwar > 0) {
-            filtered = filtered.filter(p => (p.bwar || 0) >= minFwar);
+    }
+    if (minFwar > 0) {
+        filtered = filtered.filter(p => (p.bwar || 0) >= minFwar);
+    }
+    
+    filtered.sort((a, b) => (b.bwar || 0) - (a.bwar || 0));
+    
+    allPlayers = players;
+    totalPlayers = players.length;
+    filteredPlayers = filtered;
+    filteredTotal = filtered.length;
+    nextCursor = null;
+}
+
+async function loadPlayers() {
+    const loading = document.getElementById('loading');
+    loading.style.display = 'block';
+    
+    try {
+        try {
+            const filters = currentFilters();
+            activeFilters = filters;
+            const page = await fetchPage(filters, null);
+            if (activeFilters !== filters) return;
+            if (!totalPlayers) totalPlayers = await loadTotalPlayers();
+            filteredPlayers = page.players;
+            filteredTotal = page.total;
+            nextCursor = page.next_cursor;
+        } catch (apiError) {
+            await loadAllFromStatic();
         }
         
-        filtered.sort((a, b) => (b.bwar || 0) - (a.bwar || 0));
-        
-        allPlayers = players;
-        filteredPlayers = filtered;
-        
         displayPlayers();
         updateStats();
     } catch (e) {
@@ -86,21 +140,38 @@ async function loadPlayers() {
     }
 }
 
-function displayPlayers() {
-    const tbody = document.getElementById('players-tbody');
+async function loadMorePlayers() {
+    if (!nextCursor) return;
+    const loading = document.getElementById('loading');
+    loading.style.display = 'block';
     
-    if (filteredPlayers.length === 0) {
-        tbody.innerHTML = '<tr><td colspan="8" style="text-align: center;">No players found.</td></tr>';
-        return;
+    try {
+        const filters = activeFilters;
+        const page = await fetchPage(filters, nextCursor);
+        // Apply was pressed while this page loaded; it belongs to the previous query
+        if (activeFilters !== filters) return;
+        const offset = filteredPlayers.length;
+        filteredPlayers = filteredPlayers.concat(page.players);
+        nextCursor = page.next_cursor;
+        
+        document.getElementById('players-tbody')
+            .insertAdjacentHTML('beforeend', renderRows(page.players, offset));
+        updateStats();
+    } catch (e) {
+        console.error('Error loading more players:', e);
+    } finally {
+        loading.style.display = 'none';
     }
-    
-    tbody.innerHTML = filteredPlayers.map((p, i) => {
+}
+
+function renderRows(players, offset) {
+    return players.map((p, i) => {
         const teams = Array.isArray(p.teams) ? p.teams : [p.teams].filter(Boolean);
         const positions = Array.isArray(p.positions) ? p.positions : [p.positions].filter(Boolean);
         
         return `
             <tr>
-                <td>${i + 1}</td>
+                <td>${offset + i + 1}</td>
                 <td><strong>${p.name || 'Unknown'}</strong></td>
                 <td>${p.bwar?.toFixed(1) || '0.0'}</td>
                 <td>${teams.map(t => `<span class="badge badge-team">${t}</span>`).join('')}</td>
@@ -113,12 +184,25 @@ function displayPlayers() {
     }).join('');
 }
 
+function displayPlayers() {
+    const tbody = document.getElementById('players-tbody');
+    
+    if (filteredPlayers.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="8" style="text-align: center;">No players found.</td></tr>';
+        return;
+    }
+    
+    tbody.innerHTML = renderRows(filteredPlayers, 0);
+}
+
 function updateStats() {
-    document.getElementById('total-count').textContent = `Total Players: ${allPlayers.length}`;
-    document.getElementById('showing-count').textContent = `Showing: ${filteredPlayers.length}`;
+    document.getElementById('total-count').textContent = `Total Players: ${totalPlayers}`;
+    document.getElementById('showing-count').textContent = `Showing: ${filteredPlayers.length} of ${filteredTotal}`;
+    document.getElementById('load-more').style.display = nextCursor ? 'block' : 'none';
 }
 
 document.getElementById('apply-filters').addEventListener('click', loadPlayers);
+document.getElementById('load-more').addEventListener('click', loadMorePlayers);
 document.getElementById('reset-filters').addEventListener('click', () => {
     document.getElementById('team-filter').value = '';
     document.getElementById('position-filter').value = '';
@@ -0,0 +1,149 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+import data_fetcher
+from data_fetcher import FileSource, ingest, merge_player, parse_csv, parse_html
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run the fetcher against a private data directory"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(data_fetcher, "DATA_DIR", tmp_path / "data")
+    monkeypatch.setattr(data_fetcher, "INGEST_CACHE_FILE", tmp_path / "data" / "ingest_cache.json")
+    (tmp_path / "data").mkdir()
+    for name in ("players.csv", "players_b.csv", "players.html"):
+        (tmp_path / name).write_bytes((FIXTURES / name).read_bytes())
+    return tmp_path
+
+
+def saved_players(workdir):
+    with open(workdir / "data" / "players.json") as f:
+        return {p["name"]: p for p in json.load(f)}
+
+
+def test_parse_csv():
+    records = list(parse_csv((FIXTURES / "players.csv").read_bytes()))
+    assert records[0] == {
+        "name": "New Guy", "bwar": 3.5, "teams": ["Seattle Mariners"], "positions": ["SS"],
+        "years_active": ["2020", "2024"], "signing_country": "Japan",
+    }
+    assert records[2]["teams"] == ["Texas Rangers", "Chicago Cubs"]
+    assert records[2]["positions"] == ["SP", "RP"]
+
+
+def test_parse_html_skips_repeated_header_rows():
+    records = list(parse_html((FIXTURES / "players.html").read_bytes()))
+    assert [r["name"] for r in records] == ["Html Slugger", "Html Pitcher", "Html Catcher"]
+    assert records[1] == {"name": "Html Pitcher", "bwar": 8.0, "teams": ["Miami Marlins"], "positions": ["SP"]}
+
+
+def test_merge_player_unions_lists_and_overwrites_scalars():
+    existing = {"name": "X", "bwar": 1.0, "teams": ["A"], "positions": ["C"], "minor_league": False}
+    merged = merge_player(existing, {"name": "X", "bwar": 2.0, "teams": ["B", "A"]})
+    assert merged == {"name": "X", "bwar": 2.0, "teams": ["A", "B"], "positions": ["C"], "minor_league": False}
+    assert existing["teams"] == ["A"]
+
+
+def test_ingest_merges_in_argument_order(workdir):
+    sources = [FileSource(workdir / "players_b.csv"), FileSource(workdir / "players.csv")]
+    players, _, _ = ingest(sources, [], {})
+    assert {p["name"]: p for p in players}["New Guy"]["bwar"] == 3.5
+
+    players, _, _ = ingest(list(reversed(sources)), [], {})
+    assert {p["name"]: p for p in players}["New Guy"]["bwar"] == 7.0
+
+
+def test_ingest_skips_unchanged_sources(workdir):
+    sources = [FileSource(workdir / "players.csv"), FileSource(workdir / "players.html")]
+    players, cache, stats = ingest(sources, [], {})
+    assert stats == {"changed": 2, "unchanged": 0, "failed": 0, "records": 6}
+
+    _, _, stats = ingest(sources, players, cache)
+    assert stats == {"changed": 0, "unchanged": 2, "failed": 0, "records": 0}
+
+
+def test_ingest_reports_missing_source(workdir):
+    _, cache, stats = ingest([FileSource(workdir / "missing.csv")], [], {})
+    assert stats["failed"] == 1
+    assert cache == {}
+
+
+def test_main_reingests_after_rebuild(workdir):
+    builtin = len(data_fetcher.load_real_players_only())
+    sources = ["players.csv", "players.html"]
+
+    data_fetcher.main([])
+    data_fetcher.main(sources)
+    ingested = saved_players(workdir)
+    assert "Html Catcher" in ingested and "Player" not in ingested
+    assert ingested["Babe Ruth"]["teams"][-1] == "Boston Braves"
+
+    # A second run with unchanged sources leaves the data alone
+    data_fetcher.main(sources)
+    assert saved_players(workdir) == ingested
+
+    # Rebuilding drops the ingested records, so the same sources must be merged again
+    data_fetcher.main([])
+    assert len(saved_players(workdir)) == builtin
+    data_fetcher.main(sources)
+    assert saved_players(workdir) == ingested
+
+
+def test_main_reingests_when_players_json_is_edited(workdir):
+    data_fetcher.main([])
+    data_fetcher.main(["players.csv"])
+    path = workdir / "data" / "players.json"
+    players = json.loads(path.read_text())
+    data_fetcher.write_json_atomic(path, [p for p in players if p["name"] != "New Guy"])
+
+    data_fetcher.main(["players.csv"])
+    assert "New Guy" in saved_players(workdir)
+
+
+def test_main_reingests_modified_source(workdir):
+    data_fetcher.main([])
+    data_fetcher.main(["players.csv"])
+    csv_path = workdir / "players.csv"
+    csv_path.write_text(csv_path.read_text().replace("New Guy,3.5", "New Guy,4.5"))
+    os.utime(csv_path, (time.time() + 5, time.time() + 5))
+
+    data_fetcher.main(["players.csv"])
+    assert saved_players(workdir)["New Guy"]["bwar"] == 4.5
+
+
+def test_later_source_still_wins_when_only_an_earlier_one_changes(workdir):
+    data_fetcher.main([])
+    sources = ["players.csv", "players_b.csv"]
+    data_fetcher.main(sources)
+    assert saved_players(workdir)["New Guy"]["bwar"] == 7.0
+
+    csv_path = workdir / "players.csv"
+    csv_path.write_text(csv_path.read_text().replace("Second Rookie,1.2", "Second Rookie,1.4"))
+    os.utime(csv_path, (time.time() + 5, time.time() + 5))
+
+    data_fetcher.main(sources)
+    players = saved_players(workdir)
+    assert players["Second Rookie"]["bwar"] == 1.4
+    assert players["New Guy"]["bwar"] == 7.0
+
+
+def test_unparseable_source_fails_alone(workdir):
+    (workdir / "latin1.csv").write_bytes(b"Name,WAR\nJos\xe9 X,1.0\n")
+    data_fetcher.main([])
+    data_fetcher.main(["latin1.csv", "players.csv"])
+
+    assert "New Guy" in saved_players(workdir)
+    with open(data_fetcher.INGEST_CACHE_FILE) as f:
+        cached = json.load(f)["sources"]
+    assert "players.csv" in cached
+    assert "latin1.csv" not in cached
+
+    _, _, stats = ingest([FileSource(workdir / "latin1.csv")], [], {})
+    assert stats == {"changed": 0, "unchanged": 0, "failed": 1, "records": 0}
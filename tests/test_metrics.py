@@ -0,0 +1,46 @@
+import threading
+import time
+
+import pytest
+
+import metrics
+from metrics import Registry, SamplingProfiler, query_shape
+
+
+def test_render_types_and_labels():
+    registry = Registry()
+    registry.describe("x_seconds", "An example")
+    registry.observe("x_seconds", 0.003, route="/a")
+    text = registry.render({"g": 1}, {"c_total": 2})
+    assert "# HELP x_seconds An example" in text
+    assert "# TYPE x_seconds histogram" in text
+    assert 'x_seconds_bucket{pid="' in text and 'route="/a",le="0.005"} 1' in text
+    assert "# TYPE g gauge" in text and "# TYPE c_total counter" in text
+
+
+def test_query_shape_ignores_values_and_unknown_params():
+    assert query_shape(b"team=X&min_fwar=3&utm=1") == "min_fwar,other,team"
+    assert query_shape(b"") == "none"
+
+
+def test_profile_is_written_by_the_sampler_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "PROFILE_DIR", tmp_path)
+    profiler = SamplingProfiler(interval=0.001)
+    output = profiler.start(2)
+    time.sleep(0.02)
+    profiler.request_finished()
+    assert profiler.active
+
+    writes = []
+    monkeypatch.setattr(profiler, "_write", lambda original=profiler._write: (
+        writes.append(threading.current_thread().name), original()))
+    profiler.request_finished()
+    profiler._thread.join(timeout=5)
+    assert writes == ["sampling-profiler"]
+    assert output.exists() and output.read_text()
+    assert profiler.status()["output"] == str(output)
+
+    profiler.start(1)
+    with pytest.raises(RuntimeError):
+        profiler.start(1)
+    profiler.stop()
@@ -0,0 +1,61 @@
+import base64
+
+import pytest
+
+from player_store import Snapshot, decode_cursor, encode_cursor
+
+PLAYERS = [
+    {"name": "A", "bwar": 10.0, "teams": ["Boston Red Sox"], "positions": ["SS"]},
+    {"name": "B", "bwar": 5.0, "teams": ["Boston Red Sox"], "positions": ["SP"]},
+    {"name": "C", "bwar": 5.0, "teams": ["New York Yankees"], "positions": ["RP"]},
+    {"name": "D", "fwar": 7.5, "bwar": 1.0, "teams": ["New York Yankees"], "positions": ["CF"]},
+    {"name": "E", "bwar": -1.5, "teams": ["Boston Red Sox"], "positions": ["C"]},
+    {"name": "F", "bwar": 5.0, "teams": ["Boston Red Sox"], "positions": ["1B"]},
+]
+
+
+def snapshot():
+    return Snapshot(PLAYERS, 1, 0, 0)
+
+
+@pytest.mark.parametrize("war, pid", [(0.0, 0), (5.0, 3), (-1.5, 12), (123.4, 99999)])
+def test_cursor_round_trip(war, pid):
+    assert decode_cursor(encode_cursor(war, pid)) == (war, pid)
+
+
+def raw_cursor(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "", "not-a-cursor", encode_cursor(1.0, 2)[:-3],
+    raw_cursor("[1, 1e400]"), raw_cursor("[1e400, 1]"), raw_cursor("[NaN, 1]"),
+    raw_cursor('["1", 1]'), raw_cursor("[1, 2.5]"), raw_cursor("[1, true]"), raw_cursor("[1, 2, 3]"),
+])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_query_orders_by_war_with_ties_in_file_order():
+    snap = snapshot()
+    assert [PLAYERS[i]["name"] for i in snap.query()] == ["A", "D", "B", "C", "F", "E"]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4, 10])
+@pytest.mark.parametrize("filters", [{}, {"team": "boston red sox"}, {"position": "SP"}, {"min_fwar": 5}])
+def test_pages_cover_query_exactly_once(limit, filters):
+    snap = snapshot()
+    ids = snap.query(**filters)
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = snap.page(ids, cursor, limit)
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert seen == list(ids)
+
+
+def test_nan_min_fwar_matches_nothing():
+    assert len(snapshot().query(min_fwar=float("nan"))) == 0
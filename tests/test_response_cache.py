@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from response_cache import MIN_COMPRESS_SIZE, ResponseCache
+
+SNAPSHOT = SimpleNamespace(version=1, tag="abc-10")
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    cache = ResponseCache()
+
+    @app.get("/payload")
+    async def payload(request: Request, size: int):
+        return cache.respond(request, SNAPSHOT, ("payload", size), lambda: {"data": "x" * size})
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("size, coding", [(10, None), (MIN_COMPRESS_SIZE * 4, "gzip")])
+def test_etag_names_the_applied_coding(client, size, coding):
+    response = client.get("/payload", params={"size": size}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers.get("content-encoding") == coding
+    assert response.headers["etag"] == ('"abc-10-gzip"' if coding else '"abc-10"')
+    assert response.json() == {"data": "x" * size}
+
+    revalidated = client.get("/payload", params={"size": size},
+                             headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == response.headers["etag"]
+
+
+def test_other_snapshot_tag_gets_a_full_response(client):
+    response = client.get("/payload", params={"size": 10}, headers={"If-None-Match": '"old-1"'})
+    assert response.status_code == 200
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from search_index import BLOCK_SIZE, NameIndex, normalize_name
+
+NAMES = ["Alex Rodriguez", "Iván Rodríguez", "Francisco Rodríguez", "Alex Bregman",
+         "Roberto Clemente", "Rod Carew", "Ken Griffey Jr.", "Ichiro Suzuki", None, ""]
+WARS = [117.5, 68.7, 24.2, 40.1, 94.8, 81.3, 83.8, 60.0, 99.0, 99.0]
+
+
+def make_index(names, wars):
+    order = sorted(range(len(names)), key=lambda i: (-wars[i], i))
+    rank = [0] * len(order)
+    for r, i in enumerate(order):
+        rank[i] = r
+    return NameIndex(names, rank, order)
+
+
+@pytest.fixture(scope="module")
+def index():
+    return make_index(NAMES, WARS)
+
+
+def names(ids):
+    return [NAMES[i] for i in ids]
+
+
+def test_normalize_name():
+    assert normalize_name("  Iván Rodríguez Jr. ") == "ivan rodriguez jr"
+    assert normalize_name("O'Neil") == "o neil"
+
+
+def test_prefix_matches_any_word_best_war_first(index):
+    assert names(index.search("rod")) == ["Alex Rodriguez", "Rod Carew", "Iván Rodríguez", "Francisco Rodríguez"]
+    assert names(index.search("Rodríguez")) == ["Alex Rodriguez", "Iván Rodríguez", "Francisco Rodríguez"]
+    assert names(index.search("alex b")) == ["Alex Bregman"]
+
+
+def test_limit(index):
+    assert names(index.search("rod", limit=2)) == ["Alex Rodriguez", "Rod Carew"]
+
+
+def test_fuzzy_matches_misspellings(index):
+    assert names(index.search("clemnte")) == ["Roberto Clemente"]
+    assert "Ken Griffey Jr." in names(index.search("grifey"))
+
+
+def test_no_match(index):
+    assert index.search("zzzz") == []
+    assert index.search("  ") == []
+
+
+def test_prefix_agrees_with_brute_force_across_blocks():
+    rng = random.Random(1)
+    words = ["ana", "anabel", "andres", "bo", "bob", "carl", "carla"]
+    names = [f"{rng.choice(words)} {rng.choice(words)}" for _ in range(BLOCK_SIZE * 6)]
+    wars = [round(rng.uniform(-5, 50), 1) for _ in names]
+    index = make_index(names, wars)
+    for query in ["a", "an", "ana", "b", "carl", "carla b"]:
+        expected = sorted((i for i, n in enumerate(names)
+                           if n.startswith(query) or n.split(" ", 1)[1].startswith(query)),
+                          key=lambda i: (-wars[i], i))[:10]
+        assert index.prefix(query, 10) == expected
@@ -0,0 +1,71 @@
+import math
+
+import pytest
+
+import snapshot_format
+from player_store import Snapshot
+
+PLAYERS = [
+    {"name": "Babe Ruth", "bwar": 182.6, "teams": ["Boston Red Sox", "New York Yankees"],
+     "positions": ["RF", "SP"], "years_active": ["1914", "1935"], "minor_league": False,
+     "international_signing": False},
+    {"name": "José Martínez", "bwar": 5, "fwar": 4.5, "teams": ["St. Louis Cardinals"],
+     "positions": ["1B"], "years_active": ["2016", "2021"], "minor_league": True,
+     "international_signing": True, "signing_country": "Venezuela"},
+    {"name": "No Extras"},
+    {"name": "Odd Values", "bwar": None, "fwar": "n/a", "teams": ["Texas Rangers", None],
+     "positions": "SS", "years_active": ["1990s"], "minor_league": "yes",
+     "international_signing": 1, "signing_country": None, "nickname": "Odd"},
+    {"name": None, "bwar": float("inf"), "years_active": ["0199", "2000"], "teams": []},
+]
+
+
+def test_round_trip_is_lossless():
+    decoded = snapshot_format.decode(snapshot_format.encode(PLAYERS))
+    assert len(decoded) == len(PLAYERS)
+    for original, row in zip(PLAYERS, decoded):
+        assert row == original
+        for key, value in original.items():
+            assert type(row[key]) is type(value), key
+
+
+def test_nan_war_round_trips():
+    (row,) = snapshot_format.decode(snapshot_format.encode([{"name": "X", "bwar": float("nan")}]))
+    assert math.isnan(row["bwar"])
+
+
+def test_load_memory_maps_written_file(tmp_path):
+    path = tmp_path / "players.bin"
+    snapshot_format.write(path, PLAYERS)
+    assert list(snapshot_format.load(path)) == PLAYERS
+
+
+def test_columnar_snapshot_matches_json_snapshot():
+    players = [p for p in PLAYERS if p.get("name")][:2] + [
+        {"name": f"Player {i}", "bwar": float(i % 7), "teams": ["Chicago Cubs"], "positions": ["C"]}
+        for i in range(20)
+    ]
+    columnar = Snapshot(snapshot_format.decode(snapshot_format.encode(players)), 1, 0, 0)
+    plain = Snapshot(players, 1, 0, 0)
+    assert list(columnar.order) == list(plain.order)
+    assert list(columnar.rank) == list(plain.rank)
+    for attr in ("team_rosters", "by_team", "by_position"):
+        assert {k: list(v) for k, v in getattr(columnar, attr).items()} == \
+            {k: list(v) for k, v in getattr(plain, attr).items()}
+    assert columnar.query(team="chicago cubs", position="C", min_fwar=3) == \
+        plain.query(team="chicago cubs", position="C", min_fwar=3)
+
+
+def test_row_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(snapshot_format, "ROW_CACHE_SIZE", 2)
+    decoded = snapshot_format.decode(snapshot_format.encode(PLAYERS))
+    assert [decoded[i] for i in range(len(PLAYERS))] == PLAYERS
+    assert len(decoded._rows) == 2
+    assert decoded[-1] == PLAYERS[-1]
+    with pytest.raises(IndexError):
+        decoded[len(PLAYERS)]
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        snapshot_format.decode(b"not a snapshot at all")